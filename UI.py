@@ -1,152 +1,108 @@
 import streamlit as st
 import pandas as pd
-import pdfplumber
-import PyPDF2
-import re
+import os
+import hashlib
+import json
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
+from pathlib import Path
+from extractors import EXTRACTOR_VERSION, process_pdf
 
-# Function to extract details from TDS Returns PDF
-def extract_details_from_pdf(pdf_path):
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            extracted_text = ""
-
-            # Combine text from all pages
-            for page in pdf.pages:
-                extracted_text += page.extract_text() or ""
-
-            # Extract specific details
-            period_pattern = re.compile(r"period\s+(Q\d)")
-            date_range_pattern = re.compile(r"\(From\s+(\d{2}/\d{2}/\d{2})\s+to\s+(\d{2}/\d{2}/\d{2})")
-            form_no_box_pattern = re.compile(r"Form\s+No\.\s*(\d{2}\w)", re.IGNORECASE)
-            date_pattern = re.compile(r"Date:\s*(\d{2}/\d{2}/\d{4})")
-
-            # Extract Period
-            period = period_pattern.search(extracted_text)
-
-            # Extract Date Range
-            date_range = date_range_pattern.search(extracted_text)
-
-            # Extract the second occurrence of Form No.
-            form_no_matches = form_no_box_pattern.findall(extracted_text)
-            form_no = form_no_matches[1] if len(form_no_matches) > 1 else "Not found"
-
-            # Extract Date
-            date = date_pattern.search(extracted_text)
-
-            # Format extracted details as a single row DataFrame
-            details = {
-                "Period": [period.group(1) if period else "Not found"],
-                "Date Range": [f"{date_range.group(1)} to {date_range.group(2)}" if date_range else "Not found"],
-                "Form No.": [form_no],
-                "Date": [date.group(1) if date else "Not found"],
-            }
+# On-disk cache of extracted rows, next to this file; entries are pruned by age and count
+CACHE_DIR = Path(__file__).parent / ".cache"
+CACHE_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+CACHE_MAX_FILES = 1000
 
-            return pd.DataFrame(details)
+# Number of files whose rows are kept in memory, shared by all sessions
+MEMORY_CACHE_MAX_ENTRIES = 256
 
-    except Exception as e:
-        return pd.DataFrame({"Error": [str(e)]})
-
-# Function to extract table from TDS Returns PDF
-def extract_table_from_pdf(pdf_path):
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            extracted_data = []
-
-            for page in pdf.pages:
-                tables = page.extract_tables()
-
-                for table in tables:
-                    if table:
-                        for row in table:
-                            extracted_data.append(row)
-
-            headers = ["Sr. No.", "Return Type", "No. of Deductee / Party Records", "Amount Paid (₹)", "Tax Deducted / Collected (₹)", "Tax Deposited (₹)"]
-            table_data = []
-
-            for row in extracted_data:
-                if len(row) == len(headers):
-                    row_dict = dict(zip(headers, row))
-                    table_data.append(row_dict)
-
-            if len(table_data) > 1 and table_data[0]["Sr. No."] == "Sr. No.":
-                table_data.pop(0)
-
-            df = pd.DataFrame(table_data)
-            df.dropna(subset=headers, how='all', inplace=True)
-
-            return df
-
-    except Exception as e:
-        return pd.DataFrame({"Error": [str(e)]})
-
-# Function: Process HDFC Bank PDF
-def process_hdfc_bank(pdf_file):
-    extracted_text = ""
-    with pdfplumber.open(pdf_file) as pdf:
-        for page in pdf.pages:
-            extracted_text += page.extract_text() + "\n"
-    return extracted_text
-
-# Function: Parse HDFC Bank Text
-def parse_hdfc_bank_text(raw_text):
-    lines = raw_text.split("\n")
-    return {
-        "Date of Receipt": lines[12].split()[-1],
-        "Nature of Payment": lines[7].strip().replace("Nature of Payment ", ""),
-        "Basic Tax": float(lines[9].replace("Basic Tax", "").strip().replace(",", "")),
-        "Interest": float(lines[14].split()[1].replace(",", "")),
-        "Penalty": float(lines[12].split()[1].replace(",", "")),
-        "Fee (Sec. 234E)": float(lines[15].split()[3].replace(",", "")),
-        "TOTAL Amount": float(lines[16].split("Drawn on")[0].replace("TOTAL", "").strip().replace(",", "")),
-        "Drawn on": lines[16].split("Drawn on")[-1].strip(),
-        "Payment Realisation Date": lines[19].split()[-1],
-        "Challan No": int(lines[10].split()[-1].replace(",", "")),
-        "Challan Serial No.": int(lines[13].split()[-1].replace(",", ""))
-    }
-
-# Function: Process Income Tax PDF
-def process_income_tax(pdf_file):
-    reader = PyPDF2.PdfReader(pdf_file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text()
-    return text
-
-# Function: Parse Income Tax Text
-def parse_income_tax_text(text):
-    details = {}
-    lines = text.split("\n")
-    for line in lines:
-        if "Nature of Payment" in line:
-            details["Nature of Payment"] = line.split(":")[-1].strip()
-        elif "Amount (in Rs.)" in line:
-            details["Amount (in Rs.)"] = line.split(":")[-1].strip()
-        elif "Challan No" in line:
-            details["Challan No."] = line.split(":")[-1].strip()
-        elif "Tender Date" in line:
-            tender_date_raw = line.split(":")[-1]
-            tender_date_cleaned = tender_date_raw.split("Tax Breakup Details")[0].strip()
-            details["Tender Date"] = tender_date_cleaned
-        elif line.startswith("DInterest"):
-            details["Interest"] = line.split("₹")[-1].strip()
-        elif line.startswith("EPenalty"):
-            details["Penalty"] = line.split("₹")[-1].strip()
-        elif line.startswith("FFee under section 234E"):
-            details["Fee (Sec. 234E)"] = line.split("₹")[-1].strip()
-        elif line.startswith("Total (A+B+C+D+E+F)"):
-            details["TOTAL"] = line.split("₹")[-1].strip()
-    return details
+# Smaller batches are processed inline; handing a small challan to a worker costs more than parsing it
+PARALLEL_MIN_FILES = 4
 
 # Function: Save Data to Excel
 def save_to_excel(data_frames):
     output = BytesIO()
-    combined_df = pd.concat(data_frames, ignore_index=True)
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+    # A single frame is written as is rather than copied through concat
+    combined_df = data_frames[0] if len(data_frames) == 1 else pd.concat(data_frames, ignore_index=True)
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
         combined_df.to_excel(writer, index=False, sheet_name="Extracted Data", float_format="%.2f")
     output.seek(0)
     return output
 
+# Function: Shared cache of extracted rows, kept across reruns and refreshes
+@st.cache_resource
+def get_extraction_cache():
+    # (extractor version, SHA-256 of file bytes, document type, payment source) -> rows, least recently used first;
+    # sessions run in separate threads, so access goes through the lock
+    return OrderedDict(), threading.Lock()
+
+# Function: Keep rows in the memory cache, evicting the least recently used files
+def remember_rows(cache, key, rows):
+    rows_by_key, lock = cache
+    with lock:
+        rows_by_key[key] = rows
+        rows_by_key.move_to_end(key)
+        while len(rows_by_key) > MEMORY_CACHE_MAX_ENTRIES:
+            rows_by_key.popitem(last=False)
+
+# Function: Long-lived worker pool shared by all sessions
+@st.cache_resource
+def get_process_pool():
+    # Start workers with forkserver/spawn rather than forking the multithreaded Streamlit server
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context(method))
+
+# Function: Path of the disk cache entry for a file
+def cache_path(key):
+    version, digest, option, payment_option = key
+    return CACHE_DIR / f"v{version}_{option}_{payment_option}_{digest}.json".replace(" ", "_")
+
+# Function: Remove disk cache entries that are expired, from an older extractor version, or over the file limit
+def prune_disk_cache():
+    try:
+        entries = sorted(CACHE_DIR.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+        cutoff = time.time() - CACHE_MAX_AGE_SECONDS
+        for position, path in enumerate(entries):
+            if (position >= CACHE_MAX_FILES
+                    or not path.name.startswith(f"v{EXTRACTOR_VERSION}_")
+                    or path.stat().st_mtime < cutoff):
+                path.unlink(missing_ok=True)
+    except OSError:
+        # Pruning is best effort, like the rest of the disk cache
+        pass
+
+# Function: Look up cached rows in memory, then on disk
+def get_cached_rows(cache, key):
+    rows_by_key, lock = cache
+    with lock:
+        if key in rows_by_key:
+            rows_by_key.move_to_end(key)
+            return rows_by_key[key]
+    path = cache_path(key)
+    try:
+        if path.stat().st_mtime < time.time() - CACHE_MAX_AGE_SECONDS:
+            return None
+        rows = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    remember_rows(cache, key, rows)
+    return rows
+
+# Function: Store rows in memory and on disk
+def store_cached_rows(cache, key, rows):
+    remember_rows(cache, key, rows)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path(key).write_text(json.dumps(rows), encoding="utf-8")
+    except OSError:
+        # The disk cache is best effort; the rows are still cached in memory
+        pass
+
 # Streamlit App
 st.set_page_config(page_title="Challan Data Extraction Tool", layout="wide")
 st.title("💼 TDS Challan Data Extraction Tool")
@@ -159,6 +115,7 @@ option = st.sidebar.radio(
     help="Choose the type of document for data extraction."
 )
 
+payment_option = None
 if option == "TDS Payments":
     payment_option = st.sidebar.radio(
         "Select Payment Source",
@@ -182,8 +139,10 @@ if uploaded_files:
     st.session_state.uploaded_files = uploaded_files
 
 if st.sidebar.button("🔄 Refresh to Upload New Files"):
-    st.session_state.clear()
-    st.experimental_rerun()
+    # Reset only the uploads; cached extractions are kept for files uploaded again
+    st.session_state.pop("uploaded_files", None)
+    st.session_state.pop("file_uploader", None)
+    st.rerun()
 
 submit = st.sidebar.button("🚀 Start Extraction")
 
@@ -191,36 +150,78 @@ submit = st.sidebar.button("🚀 Start Extraction")
 if submit and st.session_state.uploaded_files:
     st.subheader("🔍 Extracting Data from Uploaded Files")
     progress = st.progress(0)
-    extracted_data = []
-
-    # Process files based on the selected option
-    for idx, pdf_file in enumerate(st.session_state.uploaded_files):
-        try:
-            if option == "TDS Returns":
-                details_df = extract_details_from_pdf(pdf_file)
-                table_df = extract_table_from_pdf(pdf_file)
-                combined_df = pd.concat([details_df, table_df], ignore_index=True)
-            elif option == "TDS Payments" and payment_option == "HDFC Bank":
-                raw_text = process_hdfc_bank(pdf_file)
-                parsed_data = parse_hdfc_bank_text(raw_text)
-                combined_df = pd.DataFrame([parsed_data])
-            elif option == "TDS Payments" and payment_option == "Income Tax Department":
-                raw_text = process_income_tax(pdf_file)
-                parsed_data = parse_income_tax_text(raw_text)
-                combined_df = pd.DataFrame([parsed_data])
-            else:
-                raise ValueError("Invalid option selected.")
-
-            extracted_data.append(combined_df)
+    files = st.session_state.uploaded_files
+
+    # Reuse rows already extracted from identical file contents
+    cache = get_extraction_cache()
+    keys = [(EXTRACTOR_VERSION, hashlib.sha256(pdf_file.getvalue()).hexdigest(), option, payment_option) for pdf_file in files]
+    results = [get_cached_rows(cache, key) for key in keys]
+    pending = [idx for idx, file_rows in enumerate(results) if file_rows is None]
+    done = len(files) - len(pending)
+    progress.progress(done / len(files))
+
+    # Process the remaining files inline for small batches, otherwise in the shared worker pool
+    if len(pending) < PARALLEL_MIN_FILES:
+        for idx in pending:
+            try:
+                results[idx] = process_pdf(files[idx].getvalue(), option, payment_option)
+                store_cached_rows(cache, keys[idx], results[idx])
+            except Exception as e:
+                st.error(f"Error processing '{files[idx].name}': {e}")
 
             # Update progress bar
-            progress.progress((idx + 1) / len(st.session_state.uploaded_files))
-        except Exception as e:
-            st.error(f"Error processing '{pdf_file.name}': {e}")
+            done += 1
+            progress.progress(done / len(files))
+    else:
+        retry = pending
+        for attempt in range(2):
+            broken = {}
+            try:
+                executor = get_process_pool()
+                futures = {
+                    executor.submit(process_pdf, files[idx].getvalue(), option, payment_option): idx
+                    for idx in retry
+                }
+            except BrokenProcessPool as e:
+                # A worker died while the cached pool was idle
+                futures = {}
+                broken = {idx: e for idx in retry}
+
+            for future in as_completed(futures):
+                idx = futures[future]
+                try:
+                    results[idx] = future.result()
+                    store_cached_rows(cache, keys[idx], results[idx])
+                except BrokenProcessPool as e:
+                    broken[idx] = e
+                    continue
+                except Exception as e:
+                    st.error(f"Error processing '{files[idx].name}': {e}")
+
+                # Update progress bar
+                done += 1
+                progress.progress(done / len(files))
+
+            if not broken:
+                break
+            # Drop the broken pool so the retry, and later runs, start a fresh one
+            get_process_pool.clear()
+            retry = list(broken)
+
+        for idx, e in broken.items():
+            st.error(f"Error processing '{files[idx].name}': {e}")
+            done += 1
+            progress.progress(done / len(files))
+
+    if pending:
+        prune_disk_cache()
+
+    # Keep rows in upload order and build the DataFrame once
+    rows = [row for file_rows in results if file_rows is not None for row in file_rows]
 
     # Display and download results
-    if extracted_data:
-        final_combined_df = pd.concat(extracted_data, ignore_index=True)
+    if rows:
+        final_combined_df = pd.DataFrame(rows)
         st.subheader("📊 Extracted Data")
         st.dataframe(final_combined_df)
 
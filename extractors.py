@@ -0,0 +1,211 @@
+import pdfplumber
+import pypdfium2 as pdfium
+import re
+from io import BytesIO
+from itertools import chain
+
+# Version of the rows produced below; bump it whenever a parser's output changes so cached rows are not reused
+EXTRACTOR_VERSION = 2
+
+# Single alternation over the TDS Returns detail fields, so the text is scanned once
+_DETAILS_RE = re.compile(
+    r"period\s+(?P<period>Q\d)"
+    r"|\(From\s+(?P<date_from>\d{2}/\d{2}/\d{2})\s+to\s+(?P<date_to>\d{2}/\d{2}/\d{2})"
+    r"|(?i:Form\s+No\.\s*(?P<form_no>\d{2}\w))"
+    r"|Date:\s*(?P<date>\d{2}/\d{2}/\d{4})"
+)
+
+# Columns of the TDS Returns summary table
+_TABLE_HEADERS = ("Sr. No.", "Return Type", "No. of Deductee / Party Records", "Amount Paid (₹)", "Tax Deducted / Collected (₹)", "Tax Deposited (₹)")
+
+# HDFC Bank challan fields, matched by label rather than by line position.
+# Label and value must share a line ([^\S\n] is whitespace other than a newline),
+# so a missing value fails instead of picking up the next line.
+_HDFC_RE = re.compile(
+    r"Nature of Payment[^\S\n]+(?P<nature>\S.*)"
+    r"|Basic Tax[^\S\n]+(?P<basic_tax>[\d,.]+)"
+    r"|Interest[^\S\n]+(?P<interest>[\d,.]+)"
+    r"|Penalty[^\S\n]+(?P<penalty>[\d,.]+)"
+    r"|Fee[^\S\n]+\S+[^\S\n]+\S+[^\S\n]+(?P<fee>[\d,.]+)"
+    r"|TOTAL[^\S\n]+(?P<total>[\d,.]+)"
+    r"|Drawn on[^\S\n]+(?P<drawn_on>\S.*)"
+    r"|Date of Receipt[^\d\n]*(?P<receipt_date>\S+)"
+    r"|Payment Realisation Date[^\d\n]*(?P<realisation_date>\S+)"
+    r"|Challan No[^\d\n]*(?P<challan_no>[\d,]+)"
+    r"|Challan Serial No[^\d\n]*(?P<challan_serial_no>[\d,]+)"
+)
+
+# Income Tax Department challan fields: the value after the last ":" or "₹" on the labelled line
+_INCOME_TAX_RE = re.compile(
+    r"Nature of Payment[^\n]*:(?P<nature>[^:\n]*)$"
+    r"|Amount \(in Rs\.\)[^\n]*:(?P<amount>[^:\n]*)$"
+    r"|Challan No[^\n]*:(?P<challan_no>[^:\n]*)$"
+    r"|Tender Date[^\n]*:(?P<tender_date>[^:\n]*?)(?:Tax Breakup Details[^:\n]*)?$"
+    r"|^D[ \t]*Interest[^\n]*₹(?P<interest>[^₹\n]*)$"
+    r"|^E[ \t]*Penalty[^\n]*₹(?P<penalty>[^₹\n]*)$"
+    r"|^F[ \t]*Fee under section 234E[^\n]*₹(?P<fee>[^₹\n]*)$"
+    r"|^Total \(A\+B\+C\+D\+E\+F\)[^\n]*₹(?P<total>[^₹\n]*)$",
+    re.MULTILINE,
+)
+_INCOME_TAX_FIELDS = {
+    "nature": "Nature of Payment",
+    "amount": "Amount (in Rs.)",
+    "challan_no": "Challan No.",
+    "tender_date": "Tender Date",
+    "interest": "Interest",
+    "penalty": "Penalty",
+    "fee": "Fee (Sec. 234E)",
+    "total": "TOTAL",
+}
+
+# Fields every challan carries; an empty one means the text lost its line layout
+_INCOME_TAX_REQUIRED = ("Nature of Payment", "Amount (in Rs.)", "Challan No.", "Tender Date")
+
+# Function: Scan text for TDS Returns details
+def scan_details_text(text, found):
+    # Keep the first Period, Date Range and Date, and every Form No.
+    for match in _DETAILS_RE.finditer(text):
+        field = match.lastgroup
+        if field == "form_no":
+            found["form_no"].append(match.group("form_no"))
+        elif field == "date_to":
+            found.setdefault("date_range", f"{match.group('date_from')} to {match.group('date_to')}")
+        else:
+            found.setdefault(field, match.group(field))
+
+# Function: Check whether every TDS Returns detail has been found
+def details_complete(found):
+    return len(found["form_no"]) > 1 and all(field in found for field in ("period", "date_range", "date"))
+
+# Function: Extract details and table rows from TDS Returns PDF in a single page pass
+def extract_returns_from_pdf(pdf_file):
+    with pdfplumber.open(pdf_file) as pdf:
+        found = {"form_no": []}
+        table_rows = []
+
+        for page in pdf.pages:
+            # Text is only needed until all details are found; tables need every page
+            if not details_complete(found):
+                scan_details_text(page.extract_text() or "", found)
+
+            table_rows.extend(chain.from_iterable(page.extract_tables()))
+
+            # Release this page's parsed objects and text map so memory stays at about one page
+            page.close()
+
+    return found, table_rows
+
+# Function: Format TDS Returns details as a single row
+def format_details(found):
+    # Use the second occurrence of Form No.
+    form_no = found["form_no"][1] if len(found["form_no"]) > 1 else "Not found"
+
+    return {
+        "Period": found.get("period", "Not found"),
+        "Date Range": found.get("date_range", "Not found"),
+        "Form No.": form_no,
+        "Date": found.get("date", "Not found"),
+    }
+
+# Function: Format TDS Returns table rows as row dicts
+def format_table(table_rows):
+    # Filter on the raw rows so only rows that are kept get a dict
+    table_data = [row for row in table_rows if len(row) == len(_TABLE_HEADERS)]
+
+    if len(table_data) > 1 and table_data[0][0] == "Sr. No.":
+        table_data.pop(0)
+
+    # Drop rows where every cell is empty
+    return [dict(zip(_TABLE_HEADERS, row)) for row in table_data if any(value is not None for value in row)]
+
+# Function: Extract raw page text with PDFium
+def extract_text_with_pdfium(pdf_file):
+    # Text comes back in content-stream order, so labels and values drawn in separate passes land on separate lines
+    pdf = pdfium.PdfDocument(pdf_file.getvalue())
+    try:
+        return "\n".join(page.get_textpage().get_text_range() for page in pdf)
+    finally:
+        pdf.close()
+
+# Function: Extract raw page text with pdfplumber
+def extract_text_with_pdfplumber(pdf_file):
+    # Slower than PDFium, but rebuilds visual lines from character positions
+    with pdfplumber.open(pdf_file) as pdf:
+        return "\n".join(page.extract_text() or "" for page in pdf.pages)
+
+# Function: Process HDFC Bank PDF
+def process_hdfc_bank(pdf_file):
+    # PDFium's content-stream order can put labels and values on separate lines
+    return extract_text_with_pdfplumber(pdf_file)
+
+# Function: Convert an amount such as "1,23,456.00" to a float
+def parse_amount(value):
+    try:
+        return float(value.replace(",", ""))
+    except ValueError:
+        return float("nan")
+
+# Function: Parse HDFC Bank Text
+def parse_hdfc_bank_text(raw_text):
+    # Keep the first value found for each field
+    fields = {}
+    for match in _HDFC_RE.finditer(raw_text):
+        for name, value in match.groupdict().items():
+            if value is not None:
+                fields.setdefault(name, value.strip())
+
+    # Fail with the field names rather than a bare KeyError when a label is missing
+    missing = [name.replace("_", " ") for name in _HDFC_RE.groupindex if name not in fields]
+    if missing:
+        raise ValueError(f"HDFC Bank challan fields not found: {', '.join(missing)}")
+
+    # A malformed amount becomes NaN instead of failing the whole file
+    amounts = {name: parse_amount(fields[name]) for name in ("basic_tax", "interest", "penalty", "fee", "total")}
+
+    return {
+        "Date of Receipt": fields["receipt_date"],
+        "Nature of Payment": fields["nature"],
+        "Basic Tax": amounts["basic_tax"],
+        "Interest": amounts["interest"],
+        "Penalty": amounts["penalty"],
+        "Fee (Sec. 234E)": amounts["fee"],
+        "TOTAL Amount": amounts["total"],
+        "Drawn on": fields["drawn_on"],
+        "Payment Realisation Date": fields["realisation_date"],
+        "Challan No": int(fields["challan_no"].replace(",", "")),
+        "Challan Serial No.": int(fields["challan_serial_no"].replace(",", ""))
+    }
+
+# Function: Process Income Tax PDF
+def process_income_tax(pdf_file):
+    # Try PDFium first and fall back to pdfplumber when its line order leaves a required field empty
+    text = extract_text_with_pdfium(pdf_file)
+    details = parse_income_tax_text(text)
+    if all(details.get(field) for field in _INCOME_TAX_REQUIRED):
+        return text
+    return extract_text_with_pdfplumber(pdf_file)
+
+# Function: Parse Income Tax Text
+def parse_income_tax_text(text):
+    # Later occurrences of a field overwrite earlier ones
+    details = {}
+    for match in _INCOME_TAX_RE.finditer(text):
+        details[_INCOME_TAX_FIELDS[match.lastgroup]] = match.group(match.lastgroup).strip()
+    return details
+
+# Function: Process one uploaded PDF into row dicts
+# Kept at module level (outside the Streamlit script) so worker processes can import it
+def process_pdf(data, option, payment_option):
+    pdf_file = BytesIO(data)
+
+    if option == "TDS Returns":
+        found, table_rows = extract_returns_from_pdf(pdf_file)
+        return [format_details(found)] + format_table(table_rows)
+    elif option == "TDS Payments" and payment_option == "HDFC Bank":
+        raw_text = process_hdfc_bank(pdf_file)
+        return [parse_hdfc_bank_text(raw_text)]
+    elif option == "TDS Payments" and payment_option == "Income Tax Department":
+        raw_text = process_income_tax(pdf_file)
+        return [parse_income_tax_text(raw_text)]
+    else:
+        raise ValueError("Invalid option selected.")
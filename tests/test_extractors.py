@@ -0,0 +1,153 @@
+import re
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+import pdfplumber
+import pytest
+
+from extractors import (
+    extract_returns_from_pdf,
+    format_details,
+    format_table,
+    parse_hdfc_bank_text,
+    parse_income_tax_text,
+    process_hdfc_bank,
+    process_income_tax,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def read_fixture(name):
+    # Keep line endings as captured; PDFium separates lines with "\r\n"
+    with open(FIXTURES / name, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def read_pdf_fixture(name):
+    return BytesIO((FIXTURES / name).read_bytes())
+
+
+# The positional parser that parse_hdfc_bank_text replaced, kept as the reference
+def baseline_parse_hdfc_bank_text(raw_text):
+    lines = raw_text.split("\n")
+    return {
+        "Date of Receipt": lines[12].split()[-1],
+        "Nature of Payment": lines[7].strip().replace("Nature of Payment ", ""),
+        "Basic Tax": float(lines[9].replace("Basic Tax", "").strip().replace(",", "")),
+        "Interest": float(lines[14].split()[1].replace(",", "")),
+        "Penalty": float(lines[12].split()[1].replace(",", "")),
+        "Fee (Sec. 234E)": float(lines[15].split()[3].replace(",", "")),
+        "TOTAL Amount": float(lines[16].split("Drawn on")[0].replace("TOTAL", "").strip().replace(",", "")),
+        "Drawn on": lines[16].split("Drawn on")[-1].strip(),
+        "Payment Realisation Date": lines[19].split()[-1],
+        "Challan No": int(lines[10].split()[-1].replace(",", "")),
+        "Challan Serial No.": int(lines[13].split()[-1].replace(",", ""))
+    }
+
+
+EXPECTED_HDFC_BANK_ROW = baseline_parse_hdfc_bank_text(read_fixture("hdfc_bank_challan.txt"))
+
+
+def test_hdfc_bank_matches_positional_parser():
+    text = read_fixture("hdfc_bank_challan.txt")
+    assert parse_hdfc_bank_text(text) == baseline_parse_hdfc_bank_text(text)
+
+
+def test_hdfc_bank_does_not_take_value_from_another_line():
+    # Labels and values on separate lines, as in content-stream ordered text
+    text = read_fixture("hdfc_bank_challan_stream_order.txt")
+    with pytest.raises(ValueError, match="nature"):
+        parse_hdfc_bank_text(text)
+
+
+@pytest.mark.parametrize("name", ["hdfc_bank_challan.pdf", "hdfc_bank_challan_two_pass.pdf"])
+def test_hdfc_bank_pdf_text_parses(name):
+    row = parse_hdfc_bank_text(process_hdfc_bank(read_pdf_fixture(name)))
+    for field in ("Basic Tax", "Interest", "Penalty", "Fee (Sec. 234E)", "TOTAL Amount", "Challan No", "Challan Serial No."):
+        assert row[field] == EXPECTED_HDFC_BANK_ROW[field]
+
+
+EXPECTED_INCOME_TAX_ROW = {
+    "Nature of Payment": "94C",
+    "Amount (in Rs.)": "₹ 1,00,350",
+    "Challan No.": "12345",
+    "Tender Date": "12/05/2024",
+    "Interest": "150",
+    "Penalty": "0",
+    "Fee (Sec. 234E)": "200",
+    "TOTAL": "1,00,350",
+}
+
+
+@pytest.mark.parametrize("name", ["income_tax_challan.pdf", "income_tax_challan_two_pass.pdf"])
+def test_income_tax_pdf_text_parses(name):
+    # The two-pass PDF draws every label before any value, so PDFium's text is not line ordered
+    text = process_income_tax(read_pdf_fixture(name))
+    assert parse_income_tax_text(text) == EXPECTED_INCOME_TAX_ROW
+
+
+def test_income_tax_pypdf2_style_text_parses():
+    # Breakup row letters run into their labels ("DInterest") in the old PyPDF2 text
+    assert parse_income_tax_text(read_fixture("income_tax_challan.txt")) == EXPECTED_INCOME_TAX_ROW
+
+
+def test_income_tax_row_letter_does_not_join_next_line():
+    text = "D\nInterest on delayed payment ₹ 150\n"
+    assert "Interest" not in parse_income_tax_text(text)
+
+
+# The TDS Returns details extraction that format_details replaced, kept as the reference
+def baseline_extract_details_from_pdf(pdf_file):
+    with pdfplumber.open(pdf_file) as pdf:
+        extracted_text = ""
+        for page in pdf.pages:
+            extracted_text += page.extract_text() or ""
+
+    period = re.compile(r"period\s+(Q\d)").search(extracted_text)
+    date_range = re.compile(r"\(From\s+(\d{2}/\d{2}/\d{2})\s+to\s+(\d{2}/\d{2}/\d{2})").search(extracted_text)
+    form_no_matches = re.compile(r"Form\s+No\.\s*(\d{2}\w)", re.IGNORECASE).findall(extracted_text)
+    form_no = form_no_matches[1] if len(form_no_matches) > 1 else "Not found"
+    date = re.compile(r"Date:\s*(\d{2}/\d{2}/\d{4})").search(extracted_text)
+
+    return pd.DataFrame({
+        "Period": [period.group(1) if period else "Not found"],
+        "Date Range": [f"{date_range.group(1)} to {date_range.group(2)}" if date_range else "Not found"],
+        "Form No.": [form_no],
+        "Date": [date.group(1) if date else "Not found"],
+    })
+
+
+# The TDS Returns table filtering that format_table replaced, kept as the reference
+def baseline_table_from_rows(extracted_data):
+    headers = ["Sr. No.", "Return Type", "No. of Deductee / Party Records", "Amount Paid (₹)", "Tax Deducted / Collected (₹)", "Tax Deposited (₹)"]
+    table_data = []
+
+    for row in extracted_data:
+        if len(row) == len(headers):
+            row_dict = dict(zip(headers, row))
+            table_data.append(row_dict)
+
+    if len(table_data) > 1 and table_data[0]["Sr. No."] == "Sr. No.":
+        table_data.pop(0)
+
+    df = pd.DataFrame(table_data)
+    df.dropna(subset=headers, how='all', inplace=True)
+    return df
+
+
+def test_tds_return_details_match_baseline():
+    # Three Form Nos. and two Dates across two pages; the second Form No. and first Date are kept
+    found, _ = extract_returns_from_pdf(read_pdf_fixture("tds_return.pdf"))
+    expected = baseline_extract_details_from_pdf(read_pdf_fixture("tds_return.pdf"))
+    assert [format_details(found)] == expected.to_dict("records")
+
+
+def test_tds_return_table_matches_baseline():
+    _, table_rows = extract_returns_from_pdf(read_pdf_fixture("tds_return.pdf"))
+    # Add an all-empty row and a row of the wrong width, which pdfplumber can also produce
+    table_rows += [[None] * 6, ["Total", "1000"]]
+    # Compare as frames, as the app displays them; pandas stores the baseline's None cells as NaN
+    expected = baseline_table_from_rows(table_rows).reset_index(drop=True)
+    pd.testing.assert_frame_equal(pd.DataFrame(format_table(table_rows)), expected)